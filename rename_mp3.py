@@ -1,61 +1,98 @@
+from functools import lru_cache, partial
+import operator
+import os
 from pathlib import Path
+from stat import S_ISREG
 import unicodedata
-from typing import Optional, Dict, List, Tuple
+from typing import Iterator, NamedTuple, Optional, Dict, List, Tuple
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 import argparse
+import re
 
+_nfkc = unicodedata.normalize
 
+# EX_キャラクター_接尾辞.mp3 / 01_キャラクター_接尾辞.mp3 / キャラクター_接尾辞.mp3
+_FILE_NAME_PATTERN = re.compile(r'(?:(EX_)|(?!EX_)(?:01_)?)([^_]*)_([^_]*)(?i:\.mp3)')
+
+
+class ParsedFileName(NamedTuple):
+    """ファイル名の解析結果を保持する型定義"""
+    character: str
+    suffix: str
+    is_ex: bool
+
+
+@lru_cache(maxsize=4096)
 def normalize_file_name(file_name: str) -> str:
-    """NFKC正規化を行う"""
-    return unicodedata.normalize('NFKC', file_name)
+    """NFKC正規化を行う (ASCIIのみ、または正規化済みのファイル名はそのまま返す)"""
+    if file_name.isascii() or unicodedata.is_normalized('NFKC', file_name):
+        return file_name
+    return _nfkc('NFKC', file_name)
 
 
-def parse_file_name(file_name: str) -> Optional[Dict[str, object]]:
+@lru_cache(maxsize=4096)
+def parse_file_name(file_name: str) -> Optional[ParsedFileName]:
     """ファイル名を解析して必要な情報を抽出する"""
-    if file_name.startswith('EX_'):
-        parts = file_name[3:-4].split('_')
-        if len(parts) == 2:
-            return {
-                'Character': parts[0],
-                'Suffix': parts[1],
-                'IsEX': True
-            }
+    match = _FILE_NAME_PATTERN.fullmatch(file_name)
+    if not match:
         return None
 
-    parts = file_name[:-4].split('_')
-    if len(parts) == 2:
-        return {
-            'Character': parts[0],
-            'Suffix': parts[1],
-            'IsEX': False
-        }
-    if len(parts) == 3 and parts[0] == '01':
-        return {
-            'Character': parts[1],
-            'Suffix': parts[2],
-            'IsEX': False
-        }
-    return None
-
-
-def generate_new_file_name(parsed_name: Dict[str, object]) -> str:
+    return ParsedFileName(match.group(2), match.group(3), match.group(1) is not None)
+
+
+def generate_new_file_name(parsed_name: ParsedFileName) -> str:
     """新しいファイル名を生成する"""
-    character = parsed_name['Character']
-    suffix = parsed_name['Suffix']
-    is_ex = parsed_name['IsEX']
+    character, suffix, is_ex = parsed_name
 
     number = "02" if is_ex else "01"
     ex_suffix = " EX" if is_ex else ""
     return f"[{suffix}]{character} - {number} {suffix}{ex_suffix}.mp3"
 
 
-def get_renamed_files(directory_path: Path, recursive: bool = False) -> list[tuple[Path, Path]]:
-    """リネーム後のファイル名のリストを取得する"""
-    renamed_files = []
-
-    for file_path in directory_path.rglob("*.mp3") if recursive else directory_path.glob("*.mp3"):
+def _is_file_at(file_name: str, dir_fd: int) -> bool:
+    """ディレクトリのファイルディスクリプタを基準に、通常のファイル (リンク先を含む) かを調べる"""
+    try:
+        return S_ISREG(os.stat(file_name, dir_fd=dir_fd).st_mode)
+    except OSError:
+        # リンク切れなど
+        return False
+
+
+def _iter_mp3(directory_path: Path, recursive: bool = False) -> Iterator[Path]:
+    """ディレクトリ内のmp3ファイルを列挙する"""
+    if recursive and hasattr(os, 'fwalk'):
+        # os.fwalk は起点のディレクトリが読めない場合だけは例外を送出するため、先に確かめる
+        if not os.path.isdir(directory_path):
+            return
+        # 各ディレクトリのファイルディスクリプタを基準に走査し、パスの解決を減らす
+        for dir_path, _, file_names, dir_fd in os.fwalk(directory_path):
+            for file_name in file_names:
+                # 拡張子の大文字・小文字は区別せず、リンク切れやFIFOなどは scandir の場合と同様に除く
+                if file_name[-4:].lower() == '.mp3' and _is_file_at(file_name, dir_fd):
+                    yield Path(dir_path, file_name)
+        return
+
+    stack = [directory_path]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            # 読めないディレクトリ (存在しない、権限がないなど) は os.fwalk と同様に読み飛ばす
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif entry.name[-4:].lower() == '.mp3' and entry.is_file():
+                    yield Path(entry.path)
+
+
+def get_renamed_files(directory_path: Path, recursive: bool = False) -> Iterator[Tuple[Path, Path]]:
+    """リネーム前後のファイルパスを順に返す"""
+    for file_path in _iter_mp3(directory_path, recursive):
         normalized_file_name = normalize_file_name(file_path.name)
         parsed_name = parse_file_name(normalized_file_name)
 
@@ -64,26 +101,141 @@ def get_renamed_files(directory_path: Path, recursive: bool = False) -> list[tup
             continue
 
         new_name = generate_new_file_name(parsed_name)
-        new_path = file_path.parent / new_name
-        renamed_files.append((file_path, new_path))
-    return renamed_files
+        yield file_path, file_path.parent / new_name
 
 
 def rename_files(path: str, renamed_files: List[Tuple[str, str]], root: tk.Tk, dry_run: bool = False) -> None:
     """実際にファイルをリネームする"""
+    # 同じディレクトリのファイルをまとめ、ディレクトリのファイルディスクリプタを基準にファイル名だけでリネームする
+    # (開いておくのは常に1つだけにし、ディレクトリが多くてもファイルディスクリプタを使い切らないようにする)
+    use_dir_fd = os.rename in os.supports_dir_fd
+    groups: Dict[Optional[Path], List[Tuple[Path, Path]]] = {}
     for old_name, new_name in renamed_files:
         old_path = Path(path) / old_name
         new_path = Path(path) / new_name
         if dry_run:
             print(f"Dry-run: Would rename {old_path} to {new_path}")
-        else:
-            old_path.rename(new_path)
+            continue
+        parent = old_path.parent if use_dir_fd and old_path.parent == new_path.parent else None
+        groups.setdefault(parent, []).append((old_path, new_path))
+
+    for parent, paths in groups.items():
+        if parent is None:
+            for old_path, new_path in paths:
+                old_path.rename(new_path)
+            continue
+
+        dir_fd = os.open(parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            for old_path, new_path in paths:
+                os.rename(old_path.name, new_path.name, src_dir_fd=dir_fd, dst_dir_fd=dir_fd)
+        finally:
+            os.close(dir_fd)
 
     if not dry_run:
         messagebox.showinfo("完了", "ファイルのリネームが完了しました。")
     root.destroy()
 
 
+class VirtualTreeview:
+    """表示範囲の行だけをTreeviewに挿入し、スクロールに合わせて値を差し替える"""
+
+    def __init__(self, tree: ttk.Treeview, scrollbar: ttk.Scrollbar, rows: List[Tuple[str, ...]]):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.rows = rows
+        self.offset = 0
+
+        scrollbar.configure(command=self.yview)
+        tree.bind("<Configure>", lambda e: tree.after_idle(self.refresh))
+        for widget in (tree, scrollbar):
+            widget.bind("<MouseWheel>", self.on_mousewheel)
+            widget.bind("<Button-4>", self.on_mousewheel)
+            widget.bind("<Button-5>", self.on_mousewheel)
+        for key in ("<Up>", "<Down>", "<Prior>", "<Next>"):
+            tree.bind(key, self.on_key)
+        self.refresh()
+
+    def visible_count(self) -> int:
+        """Treeviewの高さに収まる行数を求める"""
+        children = self.tree.get_children()
+        bbox = self.tree.bbox(children[0]) if children else ''
+        if bbox:
+            _, top, _, row_height = bbox
+        else:
+            # まだ描画されていない場合は見出しと行が同じ高さとみなす
+            row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+            top = row_height
+        return max(1, (self.tree.winfo_height() - top) // row_height)
+
+    def refresh(self) -> None:
+        """表示範囲の行の値を差し替える"""
+        count = min(self.visible_count(), len(self.rows))
+        children = self.tree.get_children()
+        if len(children) > count:
+            self.tree.delete(*children[count:])
+        for _ in range(len(children), count):
+            self.tree.insert('', tk.END)
+
+        self.offset = max(0, min(self.offset, len(self.rows) - count))
+        for iid, values in zip(self.tree.get_children(), self.rows[self.offset:self.offset + count]):
+            self.tree.item(iid, values=values)
+        self.tree.yview_moveto(0)
+
+        if self.rows:
+            self.scrollbar.set(self.offset / len(self.rows), (self.offset + count) / len(self.rows))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, offset: int) -> None:
+        """指定した行が先頭になるように表示範囲を移動する"""
+        if offset != self.offset:
+            # 選択は表示位置に紐づくため、移動したら解除する
+            self.tree.selection_set(())
+            self.offset = offset
+        self.refresh()
+
+    def yview(self, *args) -> None:
+        """スクロールバーの操作に合わせて表示範囲を移動する"""
+        if args[0] == tk.MOVETO:
+            self.scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == tk.SCROLL:
+            step = len(self.tree.get_children()) if args[2] == tk.PAGES else 1
+            self.scroll_to(self.offset + int(args[1]) * step)
+
+    def on_mousewheel(self, event) -> str:
+        """マウスホイールで表示範囲を移動する"""
+        up = event.num == 4 or (event.num != 5 and event.delta > 0)
+        self.scroll_to(self.offset + (-3 if up else 3))
+        return "break"
+
+    def on_key(self, event) -> Optional[str]:
+        """カーソルキーとPageUp/PageDownで表示範囲を移動する"""
+        children = self.tree.get_children()
+        if not children:
+            return None
+
+        if event.keysym in ('Prior', 'Next'):
+            step = len(children) if event.keysym == 'Next' else -len(children)
+            self.scroll_to(self.offset + step)
+            return "break"
+
+        # 表示範囲の端の行から更に進む場合だけ表示範囲を1行ずらし、端の行を選択し直す
+        focus = self.tree.focus()
+        if event.keysym == 'Up' and focus == children[0] and self.offset > 0:
+            edge = children[0]
+            self.scroll_to(self.offset - 1)
+        elif event.keysym == 'Down' and focus == children[-1] and self.offset + len(children) < len(self.rows):
+            edge = children[-1]
+            self.scroll_to(self.offset + 1)
+        else:
+            return None
+
+        self.tree.selection_set(edge)
+        self.tree.focus(edge)
+        return "break"
+
+
 def setup_preview_gui(root, directory_path, renamed_files, dry_run):
     """リネーム後のファイル名をGUIでプレビューするためのセットアップ"""
     frame = ttk.Frame(root, padding=10)
@@ -97,19 +249,20 @@ def setup_preview_gui(root, directory_path, renamed_files, dry_run):
     root.geometry(f"{window_width}x{window_height}")
 
     tree = ttk.Treeview(frame, columns=('Old Name', 'New Name'), show='headings')
-    tree.heading('Old Name', text='元のファイル名', command=lambda: sortby(tree, 'Old Name', False))
-    tree.heading('New Name', text='新しいファイル名', command=lambda: sortby(tree, 'New Name', False))
-
-    for old_name, new_name in renamed_files:
-        tree.insert('', tk.END, values=(old_name, new_name))
-
     tree.grid(row=0, column=0, sticky=tk.W + tk.E + tk.N + tk.S)
 
-    # スクロールバーを追加
-    scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
-    tree.configure(yscrollcommand=scrollbar.set)
+    # スクロールバーを追加 (表示範囲の行だけを挿入するため、スクロールは自前で管理する)
+    scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL)
     scrollbar.grid(row=0, column=1, sticky=tk.N + tk.S)
 
+    # 走査しながら表示用の行を作り、リネームにも同じ一覧を使う
+    rows = [(str(old_name), str(new_name)) for old_name, new_name in renamed_files]
+    view = VirtualTreeview(tree, scrollbar, rows)
+
+    sort_state: Dict[str, bool] = {}
+    tree.heading('Old Name', text='元のファイル名', command=partial(sortby, view, 'Old Name', sort_state))
+    tree.heading('New Name', text='新しいファイル名', command=partial(sortby, view, 'New Name', sort_state))
+
     # リサイズ設定
     frame.columnconfigure(0, weight=1)
     frame.rowconfigure(0, weight=1)
@@ -121,7 +274,7 @@ def setup_preview_gui(root, directory_path, renamed_files, dry_run):
     button_frame.grid(row=1, column=0, sticky=tk.W + tk.E + tk.N + tk.S)
 
     confirm_button_text = "リネームを実行 (dry-run のため実際には書き込まれません)" if dry_run else "リネームを実行"
-    confirm_button = ttk.Button(button_frame, text=confirm_button_text, command=lambda: rename_files(directory_path, renamed_files, root, dry_run))
+    confirm_button = ttk.Button(button_frame, text=confirm_button_text, command=lambda: rename_files(directory_path, rows, root, dry_run))
     confirm_button.grid(row=0, column=0, padx=5, pady=5)
 
     cancel_button = ttk.Button(button_frame, text="キャンセル", command=root.destroy)
@@ -131,17 +284,17 @@ def setup_preview_gui(root, directory_path, renamed_files, dry_run):
     root.rowconfigure(0, weight=1)
     root.rowconfigure(1, weight=0)
 
-    # Treeviewのセルを部分的にコピー可能にする
-    tree.bind("<Double-1>", on_double_click)
+    # Treeviewのセルを部分的にコピー可能にする (行の読み込みが終わってから有効にする)
+    root.after_idle(tree.bind, "<Double-1>", on_double_click)
 
 
-def sortby(tree, col, descending):
-    """Treeviewの並べ替えを行う"""
-    data = [(tree.set(child, col), child) for child in tree.get_children('')]
-    data.sort(reverse=descending)
-    for ix, item in enumerate(data):
-        tree.move(item[1], '', ix)
-    tree.heading(col, command=lambda: sortby(tree, col, int(not descending)))
+def sortby(view, col, sort_state):
+    """Treeviewの並べ替えを行う (同じ列を続けて選ぶと昇順と降順を切り替える)"""
+    descending = sort_state.get(col, False)
+    sort_state[col] = not descending
+    index = view.tree['columns'].index(col)
+    view.rows.sort(key=operator.itemgetter(index), reverse=descending)
+    view.refresh()
 
 
 def on_double_click(event):
@@ -1,13 +1,33 @@
 import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing
+from functools import partial
+from io import BytesIO
+from itertools import islice
+import os
+import shutil
+import sqlite3
+from stat import S_ISREG
+import sys
+import tempfile
 from pathlib import Path
-import unicodedata
-from typing import Optional, TypedDict, List, Tuple
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, TypedDict, Tuple
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
+from mutagen import PaddingInfo
 from mutagen.easyid3 import EasyID3
 from mutagen.id3._util import ID3NoHeaderError
 
+# ID3タグの後ろに確保するパディングの最小サイズ
+MIN_ID3_PADDING = 4096
+
+# 書き込み済みのファイルを記録するキャッシュのファイル名 (処理するディレクトリに置く)
+TAG_CACHE_FILE_NAME = '.id3cache.sqlite'
+
+# 書き込みの完了を確認する間隔 (ミリ秒)
+WRITE_POLL_INTERVAL_MS = 50
+
 
 class ID3Tags(TypedDict):
     """ID3タグの情報を保持する型定義"""
@@ -17,11 +37,6 @@ class ID3Tags(TypedDict):
     track_number: int
 
 
-def normalize_file_name(file_name: str) -> str:
-    """NFKC正規化を行う"""
-    return unicodedata.normalize('NFKC', file_name)
-
-
 def extract_track_info(track_part: str, artist_name: str) -> Tuple[int, str]:
     """
     トラック番号とトラック名を抽出する
@@ -42,14 +57,13 @@ def extract_track_info(track_part: str, artist_name: str) -> Tuple[int, str]:
     Returns:
         Tuple[int, str]: トラック番号とトラック名
     """
-    track_info = track_part.split(' ', 1)
+    number_part, space, track_name = track_part.partition(' ')
 
-    if len(track_info) != 2:
+    if not space:
         return 1, f"{track_part} ({artist_name})"
 
     try:
-        track_number = int(track_info[0])
-        track_name = track_info[1]
+        track_number = int(number_part)
     except ValueError:
         track_number = 1
         track_name = track_part
@@ -76,21 +90,25 @@ def parse_file_name(file_name: str) -> Optional[ID3Tags]:
     [ジューンブライド2024ボイス]ソフィア・ヴァレンタイン - 01 ジューンブライド2024ボイス.mp3
     [夜更かしボイス]五十嵐梨花 - 02 夜更かしボイス EX.mp3
     [お忍びボイス]天宮こころ - お忍びボイス.mp3
+
+    拡張子 (.mp3) の確認は呼び出し側で済んでいるものとし、末尾の4文字を取り除いて解析する
     """
-    if not file_name.endswith('.mp3'):
+    base_name = file_name[:-4]
+    if not base_name.startswith('['):
         return None
 
-    base_name = file_name[:-4]
-    parts = base_name.split(' - ')
-    if len(parts) != 2:
+    # " - " がちょうど1つだけ含まれていることを、リストを作らずに確かめる
+    prefix_part, separator, track_part = base_name.partition(' - ')
+    if not separator or ' - ' in track_part:
         return None
 
-    prefix_part, track_part = parts
-    if not prefix_part.startswith('[') or ']' not in prefix_part:
+    album_name, bracket, artist_name = prefix_part[1:].partition(']')
+    if not bracket:
         return None
 
-    album_name = prefix_part[1:prefix_part.index(']')]
-    artist_name = prefix_part[prefix_part.index(']') + 1:]
+    # 同じアルバム名・アーティスト名は多くのファイルで共通するため、文字列を共有する
+    album_name = sys.intern(album_name)
+    artist_name = sys.intern(artist_name)
 
     track_number, track_name = extract_track_info(track_part, artist_name)
 
@@ -102,41 +120,208 @@ def parse_file_name(file_name: str) -> Optional[ID3Tags]:
     )
 
 
-def write_id3_tags(file_path: Path, tags: ID3Tags, dry_run: bool = False) -> None:
+def has_id3v1(file: BinaryIO) -> bool:
+    """ファイル末尾にID3v1タグがあるかを調べる"""
+    size = file.seek(0, os.SEEK_END)
+    if size < 128:
+        return False
+    file.seek(size - 128)
+    return file.read(3) == b'TAG'
+
+
+def id3_padding(info: PaddingInfo) -> int:
+    """後からタグを書き換えてもファイル全体を書き直さずに済むよう、一定以上のパディングを確保する"""
+    return max(info.padding, MIN_ID3_PADDING)
+
+
+def fit_id3_padding(old_size: int, info: PaddingInfo) -> int:
+    """
+    空のバッファに書き出すときのパディングを決める
+
+    元のタグ領域に一定以上のパディングを残して収まる場合は、ちょうどその大きさになるようにする
+    (空のバッファでは info.padding がタグ本体の大きさの負数になる)
+    """
+    needed = -info.padding
+    if needed + MIN_ID3_PADDING <= old_size:
+        return old_size - needed
+    return MIN_ID3_PADDING
+
+
+def render_id3_tag(audio: EasyID3, padding: Optional[Callable[[PaddingInfo], int]] = None) -> bytes:
+    """ID3タグをファイルに書き込まずにバイト列として作る"""
+    buffer = BytesIO()
+    audio.save(buffer, v1=0, padding=padding)
+    return buffer.getvalue()
+
+
+def write_id3_tags(file_path: str, tags: ID3Tags, dry_run: bool = False) -> None:
     """ID3タグを書き込む"""
     if dry_run:
         print(f"Dry-run: Would process {file_path} with tags {tags}")
         return
 
-    try:
-        audio = EasyID3(file_path)
-    except ID3NoHeaderError:
-        audio = EasyID3()
-        audio.save(file_path)
-
-    audio['title'] = tags['track_name']
-    audio['artist'] = tags['artist_name']
-    audio['album'] = tags['album_name']
-    audio['tracknumber'] = str(tags['track_number'])
-    audio.save(file_path)
+    temp_path = None
+    # 読み込みと保存で同じファイルを開いたまま使い、細かな読み書きを大きなバッファにまとめる
+    with open(file_path, 'rb+', buffering=65536) as file:
+        try:
+            audio = EasyID3(file)
+            old_size = audio.size
+        except ID3NoHeaderError:
+            # タグがないファイルは空のタグを作り、書き込みは最後の1回だけにする
+            audio = EasyID3()
+            old_size = 0
+
+        audio['title'] = tags['track_name']
+        audio['artist'] = tags['artist_name']
+        audio['album'] = tags['album_name']
+        audio['tracknumber'] = str(tags['track_number'])
+
+        # ID3v1タグも更新する必要がある場合はmutagenにその場で書き込ませる
+        # シンボリックリンクやハードリンクは置き換えるとリンク先が更新されないため、同様にその場で書き込む
+        replaceable = not os.path.islink(file_path) and os.fstat(file.fileno()).st_nlink == 1
+        if not replaceable or has_id3v1(file):
+            # mutagenは渡されたファイルの現在位置からタグを探すため、先頭に戻してから保存する
+            file.seek(0)
+            audio.save(file, padding=id3_padding)
+        else:
+            # タグは1度だけ作り、パディングを含めて元のタグ領域に収まるかどうかで書き込み方を決める
+            tag_data = render_id3_tag(audio, padding=partial(fit_id3_padding, old_size))
+            if len(tag_data) == old_size:
+                # 元のタグと同じ大きさのため、その部分だけを上書きする
+                file.seek(0)
+                file.write(tag_data)
+            else:
+                # 収まらない場合にその場で書き込むと音声データ全体がずらされるため、
+                # 新しいタグと音声データを一時ファイルに順に書き出してから置き換える
+                fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(file_path))
+                try:
+                    with os.fdopen(fd, 'wb', buffering=1 << 20) as temp:
+                        temp.write(tag_data)
+                        file.seek(old_size)
+                        shutil.copyfileobj(file, temp, 1 << 20)
+                    shutil.copymode(file_path, temp_path)
+                except BaseException:
+                    os.remove(temp_path)
+                    raise
+
+    if temp_path:
+        try:
+            os.replace(temp_path, file_path)
+        except BaseException:
+            # 置き換えられなかった場合 (再生中のファイルなど) も一時ファイルを残さない
+            os.remove(temp_path)
+            raise
     print(f"Processed: {file_path}")
 
 
-def process_files(path: Path, recursive: bool = False) -> list[tuple[Path, ID3Tags]]:
-    """ディレクトリ内のファイルにID3タグを書き込む"""
-    processed_files = []
-    for file_path in Path(path).rglob("*.mp3") if recursive else Path(path).glob("*.mp3"):
-        tags = parse_file_name(file_path.name)
+def _is_file_at(file_name: str, dir_fd: int) -> bool:
+    """ディレクトリのファイルディスクリプタを基準に、通常のファイル (リンク先を含む) かを調べる"""
+    try:
+        return S_ISREG(os.stat(file_name, dir_fd=dir_fd).st_mode)
+    except OSError:
+        # リンク切れなど
+        return False
+
+
+def _iter_mp3(path: Path, recursive: bool = False) -> Iterator[Tuple[str, str]]:
+    """ディレクトリ内のmp3ファイルのパスとファイル名を列挙する"""
+    if recursive and hasattr(os, 'fwalk'):
+        # os.fwalk は起点のディレクトリが読めない場合だけは例外を送出するため、先に確かめる
+        if not os.path.isdir(path):
+            return
+        # 各ディレクトリのファイルディスクリプタを基準に走査し、パスの解決を減らす
+        for dir_path, dir_names, file_names, dir_fd in os.fwalk(path):
+            # 隠しディレクトリ (.git など) には入らない
+            dir_names[:] = [dir_name for dir_name in dir_names if not dir_name.startswith('.')]
+            for file_name in file_names:
+                # リンク切れやFIFOなどは scandir の場合と同様に除く
+                if file_name[-4:].lower() == '.mp3' and _is_file_at(file_name, dir_fd):
+                    yield os.path.join(dir_path, file_name), file_name
+        return
+
+    stack = [path]
+    while stack:
+        try:
+            entries = os.scandir(stack.pop())
+        except OSError:
+            # 読めないディレクトリ (存在しない、権限がないなど) は os.fwalk と同様に読み飛ばす
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive and not entry.name.startswith('.'):
+                        stack.append(entry.path)
+                elif entry.name[-4:].lower() == '.mp3' and entry.is_file():
+                    yield entry.path, entry.name
+
+
+def load_tag_cache(directory: Path) -> Dict[str, Tuple[int, int]]:
+    """書き込み済みのファイルのパスと、その時点の更新日時とサイズをキャッシュから読み込む"""
+    cache_path = directory / TAG_CACHE_FILE_NAME
+    if not cache_path.is_file():
+        return {}
+    try:
+        with closing(sqlite3.connect(cache_path)) as connection:
+            rows = connection.execute("SELECT path, mtime_ns, size FROM processed")
+            return {file_path: (mtime_ns, size) for file_path, mtime_ns, size in rows}
+    except sqlite3.DatabaseError:
+        # 壊れている、または別の形式のキャッシュは空とみなす
+        return {}
+
+
+def open_tag_cache(directory: Path) -> Optional[sqlite3.Connection]:
+    """書き込み済みのファイルを記録するキャッシュを開く (開けない場合はNoneを返す)"""
+    cache_path = directory / TAG_CACHE_FILE_NAME
+    try:
+        connection = sqlite3.connect(cache_path)
+        # キャッシュは壊れても空とみなすだけのため、記録のたびにディスクへの同期を待たない
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS processed (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER)")
+        return connection
+    except sqlite3.DatabaseError as e:
+        # キャッシュに記録できなくてもタグの書き込み自体は続ける
+        print(f"Skipped: {cache_path} - could not open cache ({e})")
+        return None
+
+
+def save_tag_cache(connection: sqlite3.Connection, file_paths: Iterable[str]) -> None:
+    """書き込み済みのファイルのパスと、現在の更新日時とサイズをキャッシュに記録する"""
+    rows = []
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        rows.append((os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size))
+
+    try:
+        with connection:
+            connection.executemany("INSERT OR REPLACE INTO processed VALUES (?, ?, ?)", rows)
+    except sqlite3.DatabaseError as e:
+        print(f"Skipped: {TAG_CACHE_FILE_NAME} - could not update cache ({e})")
+
+
+def process_files(path: Path, recursive: bool = False,
+                  cached: Optional[Dict[str, Tuple[int, int]]] = None) -> Iterator[Tuple[str, str, ID3Tags]]:
+    """ディレクトリ内のファイルのパス、ファイル名、ID3タグの組を順に返す (書き込み後に変更のないファイルは除く)"""
+    for file_path, file_name in _iter_mp3(path, recursive):
+        if cached:
+            # キャッシュにあるファイルだけstatし、更新日時とサイズが記録時のままなら読み飛ばす
+            entry = cached.get(os.path.abspath(file_path))
+            if entry is not None:
+                stat = os.stat(file_path)
+                if entry == (stat.st_mtime_ns, stat.st_size):
+                    print(f"Skipped: {file_path} - already tagged (use --force to write again)")
+                    continue
+
+        tags = parse_file_name(file_name)
 
         if not tags:
             print(f"Skipped: {file_path} - does not match expected pattern")
             continue
 
-        processed_files.append((file_path, tags))
-    return processed_files
+        yield file_path, file_name, tags
 
 
-def setup_preview_gui(root, processed_files, execute_writes, dry_run):
+def setup_preview_gui(root, processed_files, execute_writes, cancel_writes, dry_run):
     """ID3タグのプレビューをGUIで表示するためのセットアップ"""
     frame = ttk.Frame(root, padding=10)
     frame.grid(row=0, column=0, sticky=tk.W + tk.E + tk.N + tk.S)
@@ -149,16 +334,17 @@ def setup_preview_gui(root, processed_files, execute_writes, dry_run):
     root.geometry(f"{window_width}x{window_height}")
 
     tree = ttk.Treeview(frame, columns=('File Path', 'Title', 'Artist', 'Album', 'Track Number'), show='headings')
-    tree.heading('File Path', text='ファイルパス', command=lambda: sortby(tree, 'File Path', False))
-    tree.heading('Title', text='タイトル', command=lambda: sortby(tree, 'Title', False))
-    tree.heading('Artist', text='アーティスト', command=lambda: sortby(tree, 'Artist', False))
-    tree.heading('Album', text='アルバム', command=lambda: sortby(tree, 'Album', False))
-    tree.heading('Track Number', text='トラック番号', command=lambda: sortby(tree, 'Track Number', False))
 
-    for file_path, tags in processed_files:
-        tree.insert('', tk.END, values=(
-            file_path, tags['track_name'], tags['artist_name'], tags['album_name'], tags['track_number']))
+    # 書き込み対象の一覧と、並べ替え用の各行の値を保持する
+    loaded_files = []
+    row_cache: Dict[str, tuple] = {}
 
+    sort_state: Dict[str, bool] = {}
+    tree.heading('File Path', text='ファイルパス', command=partial(sortby, tree, 'File Path', sort_state, row_cache))
+    tree.heading('Title', text='タイトル', command=partial(sortby, tree, 'Title', sort_state, row_cache))
+    tree.heading('Artist', text='アーティスト', command=partial(sortby, tree, 'Artist', sort_state, row_cache))
+    tree.heading('Album', text='アルバム', command=partial(sortby, tree, 'Album', sort_state, row_cache))
+    tree.heading('Track Number', text='トラック番号', command=partial(sortby, tree, 'Track Number', sort_state, row_cache))
     tree.grid(row=0, column=0, sticky=tk.W + tk.E + tk.N + tk.S)
 
     # スクロールバーを追加
@@ -181,7 +367,7 @@ def setup_preview_gui(root, processed_files, execute_writes, dry_run):
 
     # 進捗バーを追加
     progress_var = tk.IntVar()
-    progress_bar = ttk.Progressbar(root, variable=progress_var, maximum=len(processed_files))
+    progress_bar = ttk.Progressbar(root, variable=progress_var)
     progress_bar.grid(row=1, column=0, padx=10, pady=10, sticky=tk.W + tk.E)
 
     current_file_var = tk.StringVar()
@@ -193,11 +379,15 @@ def setup_preview_gui(root, processed_files, execute_writes, dry_run):
     button_frame.grid(row=3, column=0, sticky=tk.W + tk.E + tk.N + tk.S)
 
     execute_button_text = "タグ書き込みを実行 (dry-run のため実際には書き込まれません)" if dry_run else "タグ書き込みを実行"
-    execute_button = ttk.Button(button_frame, text=execute_button_text, command=execute_writes)
+    execute_button = ttk.Button(button_frame, text=execute_button_text)
+    execute_button.state(['disabled'])
+    # 書き込み中も画面は操作できるため、二重に実行されないようボタンを無効にする
+    execute_button.configure(command=lambda: (execute_button.state(['disabled']), execute_writes()))
     execute_button.grid(row=0, column=0, padx=5, pady=5)
 
-    cancel_button = ttk.Button(button_frame, text="キャンセル", command=root.destroy)
+    cancel_button = ttk.Button(button_frame, text="キャンセル", command=cancel_writes)
     cancel_button.grid(row=0, column=1, padx=5, pady=5)
+    root.protocol("WM_DELETE_WINDOW", cancel_writes)
 
     root.columnconfigure(0, weight=1)
     root.rowconfigure(0, weight=1)
@@ -205,21 +395,102 @@ def setup_preview_gui(root, processed_files, execute_writes, dry_run):
     root.rowconfigure(2, weight=0)
     root.rowconfigure(3, weight=0)
 
-    # Treeviewのセルを部分的にコピー可能にする
-    tree.bind("<Double-1>", on_double_click)
+    file_iter = iter(processed_files)
+
+    def insert_chunk():
+        # ファイルの走査と同時に少しずつ挿入し、合間にTkが画面を描画できるようにする
+        chunk = list(islice(file_iter, 500))
+        for file_path, file_name, tags in chunk:
+            loaded_files.append((file_path, file_name, tags))
+            values = (file_path, tags['track_name'], tags['artist_name'], tags['album_name'], tags['track_number'])
+            row_cache[tree.insert('', tk.END, values=values)] = values
+        progress_bar.configure(maximum=len(loaded_files))
+
+        if len(chunk) == 500:
+            root.after_idle(insert_chunk)
+            return
 
-    return progress_var, current_file_var
+        # すべて読み込んでから書き込みとTreeviewのセルの部分コピーを有効にする
+        execute_button.state(['!disabled'])
+        tree.bind("<Double-1>", on_double_click)
 
+    root.after_idle(insert_chunk)
 
-def preview_id3_tags(processed_files: List[Tuple[Path, ID3Tags]], dry_run: bool) -> None:
+    return progress_var, current_file_var, loaded_files
+
+
+def preview_id3_tags(processed_files: Iterable[Tuple[str, str, ID3Tags]], dry_run: bool, directory: Path) -> None:
     """ID3タグのプレビューをGUIで表示する"""
+    executor: Optional[ThreadPoolExecutor] = None
+    futures: List[Tuple[Future, str, str]] = []
+    done = 0
+    # キャッシュへの記録はTkのスレッドだけで行い、書き込みが終わるまで同じ接続を使い続ける
+    tag_cache: Optional[sqlite3.Connection] = None
 
     def execute_writes():
-        for i, (file_path, tags) in enumerate(processed_files, 1):
-            write_id3_tags(file_path, tags, dry_run)
-            progress_var.set(i)
-            current_file_var.set(f"Processing: {file_path}")
-            root.update_idletasks()
+        nonlocal executor, tag_cache
+        if not dry_run:
+            tag_cache = open_tag_cache(directory)
+        # タグの書き込みはI/O待ちが中心のため、複数のスレッドで並行して行う
+        executor = ThreadPoolExecutor(max_workers=max(1, min(8, len(loaded_files))))
+        futures.extend((executor.submit(write_id3_tags, file_path, tags, dry_run), file_path, file_name)
+                       for file_path, file_name, tags in loaded_files)
+        executor.shutdown(wait=False)
+
+        # 完了の確認はroot.afterで定期的に行い、待っている間もTkがイベントを処理できるようにする
+        root.after(WRITE_POLL_INTERVAL_MS, poll_writes)
+
+    def poll_writes():
+        nonlocal done
+        start = done
+        # 投入した順に、完了したものまで進める
+        while done < len(futures) and futures[done][0].done():
+            future = futures[done][0]
+            if future.exception() is not None:
+                # 残りの書き込みは取り消し、書き込み終えたファイルを記録してからエラーをTkのコールバックとして送出する
+                executor.shutdown(wait=True, cancel_futures=True)
+                record_writes(futures[start:])
+                close_tag_cache()
+                future.result()
+            done += 1
+
+        # 途中でエラーになったり取り消されたりしても、書き込み済みのファイルは次回読み飛ばせるよう記録しておく
+        record_writes(futures[start:done])
+
+        if done == len(futures):
+            finish_writes()
+            return
+
+        if done:
+            progress_var.set(done)
+            current_file_var.set(f"Processing: {futures[done - 1][2]}")
+        root.after(WRITE_POLL_INTERVAL_MS, poll_writes)
+
+    def record_writes(finished):
+        if tag_cache is None:
+            return
+        file_paths = [file_path for future, file_path, _ in finished
+                      if future.done() and not future.cancelled() and future.exception() is None]
+        if file_paths:
+            save_tag_cache(tag_cache, file_paths)
+
+    def close_tag_cache():
+        nonlocal tag_cache
+        if tag_cache is not None:
+            tag_cache.close()
+            tag_cache = None
+
+    def cancel_writes():
+        # 未着手の書き込みを取り消し、書き込み中のファイルが終わるのを待ってから閉じる
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            record_writes(futures[done:])
+            close_tag_cache()
+        root.destroy()
+
+    def finish_writes():
+        close_tag_cache()
+        progress_var.set(len(loaded_files))
         messagebox.showinfo("完了", "ID3タグの書き込みが完了しました。")
         root.destroy()
 
@@ -227,18 +498,20 @@ def preview_id3_tags(processed_files: List[Tuple[Path, ID3Tags]], dry_run: bool)
     root = tk.Tk()
     root.title("ID3タグプレビュー")
 
-    progress_var, current_file_var = setup_preview_gui(root, processed_files, execute_writes, dry_run)
+    # 書き込みはプレビューに読み込んだファイルの一覧に対して行う
+    progress_var, current_file_var, loaded_files = setup_preview_gui(root, processed_files, execute_writes, cancel_writes, dry_run)
 
     root.mainloop()
 
 
-def sortby(tree, col, descending):
-    """Treeviewの並べ替えを行う"""
-    data = [(tree.set(child, col), child) for child in tree.get_children('')]
-    data.sort(reverse=descending)
-    for ix, item in enumerate(data):
-        tree.move(item[1], '', ix)
-    tree.heading(col, command=lambda: sortby(tree, col, int(not descending)))
+def sortby(tree, col, sort_state, row_cache):
+    """Treeviewの並べ替えを行う (同じ列を続けて選ぶと昇順と降順を切り替える)"""
+    descending = sort_state.get(col, False)
+    sort_state[col] = not descending
+    index = tree['columns'].index(col)
+    data = sorted(row_cache.items(), key=lambda item: item[1][index], reverse=descending)
+    for ix, (child, _) in enumerate(data):
+        tree.move(child, '', ix)
 
 
 def on_double_click(event):
@@ -266,15 +539,18 @@ def main():
     parser.add_argument("--directory", type=str, required=True, help="処理するディレクトリのパス")
     parser.add_argument("--recursive", action="store_true", help="指定するとサブディレクトリを再帰的に処理する")
     parser.add_argument("--dry-run", action="store_true", help="指定すると実際には書き込まずに処理をシミュレートする")
+    parser.add_argument("--force", action="store_true", help="指定すると書き込み済みのファイルも再度処理する")
 
     args = parser.parse_args()
     directory: str = args.directory
     recursive: bool = args.recursive
     dry_run: bool = args.dry_run
+    force: bool = args.force
 
-    files_to_process = process_files(Path(directory), recursive)
+    cached = None if force else load_tag_cache(Path(directory))
+    files_to_process = process_files(Path(directory), recursive, cached)
 
-    preview_id3_tags(files_to_process, dry_run)
+    preview_id3_tags(files_to_process, dry_run, Path(directory))
 
 
 if __name__ == "__main__":